@@ -8,13 +8,12 @@ from __future__ import unicode_literals
 
 import argparse
 import difflib
-import operator
+import itertools
 import os
 import re
 import sys
-import weakref
 
-from functools import reduce
+from collections import Counter, defaultdict
 
 class Sumfile(object):
     """A parsed summary (.sum) log file output from DejaGnu.
@@ -41,27 +40,36 @@ class Sumfile(object):
             self._read()
         return self._testcases
 
+    # Sumfiles are often several megabytes; read them in big chunks.
+    READ_BUFSIZE = 1 << 20
+
     def _read(self):
         assert self._testcases is None
         self._testcases = {}
         self.preamble = []
+        testclass = self._testclass
+        is_runline = testclass.is_runline
         testcase = None
-        for line in open(self.filename).readlines():
-            if self._testclass.is_runline(line):
-                testcase = self._testclass(line)
-                key = testcase.shortname
-                assert key not in self._testcases
-                self._testcases[key] = testcase
-            elif testcase is not None:
-                try:
-                    testcase._consume(line)
-                except:
-                    print(repr(line))
-                    raise
-            else:
-                self.preamble.append(line)
+        with open(self.filename, buffering=self.READ_BUFSIZE) as fp:
+            for line in fp:
+                if is_runline(line):
+                    if testcase is not None:
+                        testcase._finish()
+                    testcase = testclass(line)
+                    key = testcase.shortname
+                    assert key not in self._testcases
+                    self._testcases[key] = testcase
+                elif testcase is not None:
+                    try:
+                        testcase._consume(line)
+                    except:
+                        print(repr(line))
+                        raise
+                else:
+                    self.preamble.append(line)
         if testcase is not None:
             self.summary = testcase._pop_summary()
+            testcase._finish()
 
     @property
     def keys(self):
@@ -80,10 +88,9 @@ class Sumfile(object):
 
     @property
     def raw_counts(self):
-        result = {}
+        result = Counter()
         for testcase in self.testcases.values():
-            for key, count in testcase.raw_counts.items():
-                result[key] = result.get(key, 0) + count
+            result.update(testcase.raw_counts)
         return result
 
 class EquivalatableMixin(object):
@@ -93,6 +100,7 @@ class EquivalatableMixin(object):
     definition equivalent, but two objects that are equivalent are
     are not necessarily equal.
     """
+    __slots__ = ()
 
     def not_equivalent_to(self, other):
         raise NotImplementedError
@@ -113,6 +121,9 @@ class SumfileTestcase(EquivalatableMixin):
 
     https://www.gnu.org/software/dejagnu/manual/Adding-a-new-testsuite.html
     """
+    __slots__ = ("filename", "shortname", "_lines", "_text", "results",
+                 "_counts", "_raw_counts", "_summary_index",
+                 "_build_errors", "_terse_build_errors")
 
     # Lines with this start and end separate the testcases in the file.
     # We can use this to process error messages with non-parallel runs.
@@ -120,7 +131,7 @@ class SumfileTestcase(EquivalatableMixin):
     RUNLINE_SUFFIX = " ...\n"
 
     # Lines matching this regular expression are the actual results.
-    RESULTLINE_RE = re.compile("^([A-Z]+): ([^/]+/[^/]+\.exp): ")
+    RESULTLINE_RE = re.compile(r"^([A-Z]+): ([^/]+/[^/]+\.exp): ")
 
     # The final testcase will have consumed the sumfile's summary.
     # A line with this start and end should separate it from the
@@ -151,64 +162,74 @@ class SumfileTestcase(EquivalatableMixin):
 
     def __init__(self, runline):
         assert self.is_runline(runline)
-        self.lines = [runline]
+        # This testcase's filename, as recorded by DejaGnu.
+        self.filename = self._filename_from_runline(runline)
+        # This testcase's filename, relative to the testsuite.
+        self.shortname = sys.intern(
+            self._shortname_from_filename(self.filename))
+        self._lines = [runline]
+        self._text = None
         self.results = []
         self._reset_counts()
+        self._summary_index = None
+        self._build_errors = self._terse_build_errors = None
 
     def _reset_counts(self):
         self._counts = self._raw_counts = None
 
-    @property
-    def filename(self):
-        """This testcase's filename, as recorded by DejaGnu."""
-        return self._filename_from_runline(self.lines[0])
-
-    @property
-    def shortname(self):
-        """This testcase's filename, relative to the testsuite."""
-        return self._shortname_from_filename(self.filename)
-
     def _consume(self, line):
         m = self.RESULTLINE_RE.match(line)
         if m is not None:
             status, shortname = m.groups()
             assert shortname == self.shortname
-            message = line[len(m.group(0)):].strip()
-            result = SumfileTestcaseResult(
-                weakref.proxy(self),
-                len(self.lines),
-                status,
-                message)
             if status not in ("DUPLICATE", "PATH"):
+                message = line[m.end():].strip()
+                result = SumfileTestcaseResult(
+                    self,
+                    len(self._lines),
+                    status,
+                    message)
                 self._reset_counts()
                 self.results.append(result)
-        self.lines.append(line)
+        elif (line.startswith(self.SUMMARY_PREFIX)
+              and line.endswith(self.SUMMARY_SUFFIX)):
+            self._summary_index = len(self._lines)
+        self._lines.append(line)
 
     def _pop_summary(self):
-        assert self.lines
-        for index in range(-1, -1-len(self.lines), -1):
-            line = self.lines[index]
-            if (line.startswith(self.SUMMARY_PREFIX)
-                  and line.endswith(self.SUMMARY_SUFFIX)):
-                break
-        else:
-            assert False
-        index -= 1 # Pop the leading blank line too.
-        assert -index <= len(self.lines)
-        result = self.lines[index:len(self.lines)]
-        self.lines[index:len(self.lines)] = []
+        assert self._summary_index is not None
+        index = self._summary_index - 1 # Pop the leading blank line too.
+        assert index >= 0
+        self._summary_index = None
+        result = self._lines[index:]
+        del self._lines[index:]
         return result
 
+    def _finish(self):
+        # Most testcases' lines are never looked at again, and one
+        # string is much smaller than a list of one string per line.
+        self._text = "".join(self._lines)
+        self._lines = None
+
+    _SPLITLINES_RE = re.compile(r"[^\n]*\n|[^\n]+\Z")
+
+    @property
+    def lines(self):
+        """Every line of this testcase's output, runline first."""
+        if self._lines is not None:
+            return self._lines
+        return self._SPLITLINES_RE.findall(self._text)
+
     def _normalize_with(self, other):
         if other is None:
             return
         if len(self.results) != len(other.results):
             return
-        for a, b in zip(self.results, other.results):
-            a._normalize_with(b)
+        for index, (a, b) in enumerate(zip(self.results, other.results)):
+            a._normalize_with(b, index)
 
-    def _replace_result(self, orig, repl):
-        self.results[self.results.index(orig)] = repl
+    def _replace_result(self, index, repl):
+        self.results[index] = repl
         self._reset_counts()
 
     @property
@@ -216,10 +237,8 @@ class SumfileTestcase(EquivalatableMixin):
         """Raw status code counts: *PASS, *FAIL, UN*.
         """
         if self._raw_counts is None:
-            self._raw_counts = {}
-            for result in self.results:
-                self._raw_counts[result.raw_status] \
-                    = self._raw_counts.get(result.raw_status, 0) + 1
+            self._raw_counts = Counter(result.raw_status
+                                       for result in self.results)
         return self._raw_counts
 
     @property
@@ -227,10 +246,12 @@ class SumfileTestcase(EquivalatableMixin):
         """Cooked status code counts: PASS, FAIL, SKIP.
         """
         if self._counts is None:
-            self._counts = {}
-            for result in self.results:
-                self._counts[result.status] \
-                    = self._counts.get(result.status, 0) + 1
+            # Each cooked status is a function of the raw one, so
+            # fold the (few) raw counts rather than every result.
+            self._counts = Counter()
+            for raw_status, count in self.raw_counts.items():
+                status = SumfileTestcaseResult._cook_status(raw_status)
+                self._counts[status] += count
         return self._counts
 
     # Comparisons.
@@ -239,6 +260,12 @@ class SumfileTestcase(EquivalatableMixin):
             return True
         if len(self.results) != len(other.results):
             return True
+        # Equivalent results have identical raw statuses, so
+        # differing counts rule equivalence out cheaply.
+        if self.raw_counts != other.raw_counts:
+            return True
+        if self.results == other.results:
+            return False
         for a, b in zip(self.results, other.results):
             if a.not_equivalent_to(b):
                 return True
@@ -262,7 +289,7 @@ class SumfileTestcase(EquivalatableMixin):
         return self._all_one_status("SKIP")
 
     def _all_one_status(self, status):
-        return list(self.counts.keys()) == [status]
+        return self.counts.keys() == {status}
 
     @property
     def num_passed(self):
@@ -277,7 +304,7 @@ class SumfileTestcase(EquivalatableMixin):
         return self._count("SKIP")
 
     def _count(self, status):
-        return self.counts.get(status, 0)
+        return self.counts[status]
 
     # Compiler failure message extraction.
     BUILDERROR_STARTLINE_PREFIX = "gdb compile failed,"
@@ -285,18 +312,21 @@ class SumfileTestcase(EquivalatableMixin):
     @property
     def raw_build_errors(self):
         """This test's build errors, exactly as found."""
-        hunting = True
-        for line in self.lines:
-            if hunting:
-                start = line.find(self.BUILDERROR_STARTLINE_PREFIX)
-                if start < 0:
-                    continue
-                hunting = False
-                line = line[start:]
-            elif self.RESULTLINE_RE.match(line) is not None:
+        prefix = self.BUILDERROR_STARTLINE_PREFIX
+        for index, line in enumerate(self.lines):
+            start = line.find(prefix)
+            if start >= 0:
                 break
-            if line.startswith(self.BUILDERROR_STARTLINE_PREFIX):
-                line = line[len(self.BUILDERROR_STARTLINE_PREFIX):].lstrip()
+        else:
+            return
+        yield line[start + len(prefix):].lstrip()
+
+        is_resultline = self.RESULTLINE_RE.match
+        for line in itertools.islice(self.lines, index + 1, None):
+            if is_resultline(line) is not None:
+                break
+            if line.startswith(prefix):
+                line = line[len(prefix):].lstrip()
             yield line
 
     NORMALIZE_FILENAME_RE = re.compile(
@@ -304,30 +334,43 @@ class SumfileTestcase(EquivalatableMixin):
         % {"sep": os.sep,
            "pardir": os.pardir.replace(".", r"\.")})
 
+    # Lines without this can't match NORMALIZE_FILENAME_RE.
+    NORMALIZE_FILENAME_MARKER = os.sep + os.pardir + os.sep
+
     @property
     def build_errors(self):
         """This test's build errors, with filenames normalized."""
+        if self._build_errors is None:
+            self._build_errors = list(self._normalize_build_errors())
+        return self._build_errors
+
+    def _normalize_build_errors(self):
+        marker = self.NORMALIZE_FILENAME_MARKER
+        subn = self.NORMALIZE_FILENAME_RE.subn
         for line in self.raw_build_errors:
-            while True:
-                line, numsubs = self.NORMALIZE_FILENAME_RE.subn(os.sep, line)
-                if numsubs < 1:
-                    break
+            # Each substitution can expose another (for "a/b/../../")
+            # so we have to iterate, but most lines need no work.
+            if marker in line:
+                while True:
+                    line, numsubs = subn(os.sep, line)
+                    if numsubs < 1:
+                        break
             yield line
 
     @property
     def terse_build_errors(self):
         """Important lines (ideally one) from this test's build errors."""
-        lines = list(self.build_errors)
-        if not lines:
-            return
-        success = False
+        if self._terse_build_errors is None:
+            self._terse_build_errors = self._tersify_build_errors()
+        return self._terse_build_errors
 
-        for line in lines:
-            if self.is_terse_build_error(line):
-                yield line
-                success = True
-        if success:
-            return
+    def _tersify_build_errors(self):
+        lines = self.build_errors
+        if not lines:
+            return []
+        result = [line for line in lines if self.is_terse_build_error(line)]
+        if result:
+            return result
 
         print("\x1B[1;31m%s: error: can't tersify errors:\x1B[0m"
               % self.shortname)
@@ -337,29 +380,38 @@ class SumfileTestcase(EquivalatableMixin):
 
     WARNING_ERROR_RE = re.compile(r":\s*(?:warning|(?:fatal\s+)?error):\s*")
     INFILE_LOCATION_RE = re.compile(r":\d+(?::\d+)?$")
-    _compiler_prefixes = {"<unknown>:0": True}
+    _compiler_prefixes = {"<unknown>:0"}
 
     @classmethod
     def is_infile_location(cls, text):
         return cls.INFILE_LOCATION_RE.search(text) is not None
 
+    @classmethod
+    def split_build_error(cls, line):
+        """Split a warning/error line into (prefix, message), or None."""
+        m = cls.WARNING_ERROR_RE.search(line)
+        if m is None:
+            return None
+        return line[:m.start()], line[m.end():]
+
     @classmethod
     def is_terse_build_error(cls, line):
-        parts = cls.WARNING_ERROR_RE.split(line)
-        if len(parts) == 1:
+        parts = cls.split_build_error(line)
+        if parts is None:
             return False
         prefix, message = parts
         if prefix in cls._compiler_prefixes:
             # We've seen this prefix before, below.
             return True
-        if message.find(" [-W") >= 0:
+        is_infile_location = cls.is_infile_location(prefix)
+        if " [-W" in message:
             # This message is twice verified. If the prefix isn't
             # a location in a file, then assume it's the name of
             # a tool and add it to our list.
-            if not cls.is_infile_location(prefix):
-                cls._compiler_prefixes[prefix] = True
+            if not is_infile_location:
+                cls._compiler_prefixes.add(prefix)
             return True
-        if cls.is_infile_location(prefix):
+        if is_infile_location:
             # It's a location in a file, it's *probably* ok.
             return True
         return False
@@ -372,26 +424,36 @@ class SumfileTestcaseResult(EquivalatableMixin):
     The raw status can be *PASS, *FAIL, or UN*.
     The cooked status will be one of PASS, FAIL or SKIP.
     """
+    # A big run has hundreds of thousands of these.
+    __slots__ = ("testcase", "rel_lineno", "raw_status", "raw_message",
+                 "status")
+
     def __init__(self, testcase, rel_lineno, raw_status, raw_message):
         self.testcase = testcase
         self.rel_lineno = rel_lineno
-        self.raw_status = raw_status
-        self.raw_message = raw_message
+        # Statuses and many messages repeat throughout the file.
+        # Interning them saves memory and makes equality checks
+        # between results of the same run mostly pointer compares.
+        self.raw_status = raw_status = sys.intern(raw_status)
+        self.raw_message = raw_message = sys.intern(raw_message)
+        self.status = self._cook_status(raw_status)
 
     @property
     def testname(self):
         return self.testcase.shortname
 
-    @property
-    def status(self):
-        result = self.raw_status
-        if result.startswith("UN"):
-            result = "SKIP"
-        else:
-            result = result[-4:]
-        if result not in ("PASS", "FAIL", "SKIP"):
-            raise ValueError(self.raw_status)
-        return result
+    COOKED_STATUSES = {
+        "PASS": "PASS", "XPASS": "PASS", "KPASS": "PASS",
+        "FAIL": "FAIL", "XFAIL": "FAIL", "KFAIL": "FAIL",
+        "UNRESOLVED": "SKIP", "UNSUPPORTED": "SKIP", "UNTESTED": "SKIP",
+    }
+
+    @classmethod
+    def _cook_status(cls, raw_status):
+        try:
+            return cls.COOKED_STATUSES[raw_status]
+        except KeyError:
+            raise ValueError(raw_status)
 
     EXTRA_INFO_RE = re.compile(r"\s+\([^)]+\)$")
     OH_X_HEX_RE = re.compile(r"(?<=0x)[0-9a-f]+")
@@ -402,7 +464,7 @@ class SumfileTestcaseResult(EquivalatableMixin):
         # Strip extra information.
         m = self.EXTRA_INFO_RE.search(result)
         if m is not None:
-            result = result[:-len(m.group(0))]
+            result = result[:m.start()]
         # Replace hex constants.
         result = self.OH_X_HEX_RE.sub("HEXHEXHEX", result)
         # Hack gdb.base/call-sc.exp.
@@ -419,10 +481,16 @@ class SumfileTestcaseResult(EquivalatableMixin):
         return ": ".join(self.as_tuple)
 
     def __eq__(self, other):
-        return not (self != other)
+        # Compare fields directly rather than building two tuples.
+        # Paired results almost always share a testname, so check
+        # the fields that differ first.
+        return (other is not None
+                and self.raw_status == other.raw_status
+                and self.raw_message == other.raw_message
+                and self.testname == other.testname)
 
     def __ne__(self, other):
-        return other is None or self.as_tuple != other.as_tuple
+        return not (self == other)
 
     def not_equivalent_to(self, other):
         if other is None:
@@ -437,7 +505,8 @@ class SumfileTestcaseResult(EquivalatableMixin):
             return True
         return False
 
-    def _normalize_with(self, other):
+    def _normalize_with(self, other, index):
+        """Normalize with other, where both are results[index]."""
         if self.is_failure_of(other):
             passer, failer = other, self
         elif other.is_failure_of(self):
@@ -446,7 +515,7 @@ class SumfileTestcaseResult(EquivalatableMixin):
             return
         if self.is_racy_failure(failer, passer):
             # XXX: hack: this mutates the failer's testcase.
-            failer.testcase._replace_result(failer, passer)
+            failer.testcase._replace_result(index, passer)
 
     def is_failure_of(self, other):
         """Returns True if self is the FAILure to other's PASS."""
@@ -470,10 +539,11 @@ class SumfileTestcaseResult(EquivalatableMixin):
         cls.RACYFAIL_REGEXPS = []
         topdir = os.path.dirname(os.path.realpath(__file__))
         filename = os.path.join(topdir, cls.RACYFAIL_REGEXPS_FILENAME)
-        for line in open(filename).readlines():
-            line = line.rstrip()
-            if line:
-                cls.RACYFAIL_REGEXPS.append(re.compile(line))
+        with open(filename) as fp:
+            for line in fp:
+                line = line.rstrip()
+                if line:
+                    cls.RACYFAIL_REGEXPS.append(re.compile(line))
 
     @classmethod
     def is_known_racy_failure(cls, failer, passer):
@@ -512,9 +582,13 @@ class SumfileMatcher(object):
         return SumfileTestcasePair(self, a, b)
 
     def keys(self):
-        result = set(self._sfa.keys())
-        result.update(self._sfb.keys())
-        return sorted(result)
+        # Sumfiles list their testcases in (nearly) sorted order, so
+        # keeping that order lets the sort run in close to linear time.
+        keys_a = self._sfa.keys()
+        result = list(keys_a)
+        result.extend(key for key in self._sfb.keys() if key not in keys_a)
+        result.sort()
+        return result
 
     def values(self):
         return (self[key] for key in self.keys())
@@ -588,8 +662,6 @@ class SumfileTestcasePair(object):
                                             description=description))
 
     def __init__(self, matcher, a, b):
-        if not hasattr(self, "IMPROVED"):
-            self._cls_init()
         self._matcher = matcher
         self.a = a
         self.b = b
@@ -633,41 +705,88 @@ class SumfileTestcasePair(object):
         return self._categorize_nonequivalent()
 
     def _categorize_nonequivalent(self):
+        # Both testcases' counts are Counters, so absent statuses
+        # are zero.
+        a, b = self.a.counts, self.b.counts
+
         # Less passes is unambiguously a regression.
-        if self.b.num_passed < self.a.num_passed:
+        if b["PASS"] < a["PASS"]:
             return self.REGRESSED
 
         # Less skips without less passes is an improvement
         # regardless of whether we have more failures now.
-        if self.b.num_skipped < self.a.num_skipped:
+        if b["SKIP"] < a["SKIP"]:
             return self.IMPROVED
 
         # More failures without less skips is a regression.
-        if self.b.num_failed > self.a.num_failed:
+        if b["FAIL"] > a["FAIL"]:
             return self.REGRESSED
 
         # More skips without less passes is likely intentional.
-        if self.b.num_skipped > self.a.num_skipped:
+        if b["SKIP"] > a["SKIP"]:
             return self.PART_SKIPPED
 
         # More passes without less skips or more failures is an
         # improvement.
-        if self.b.num_passed > self.a.num_passed:
+        if b["PASS"] > a["PASS"]:
             return self.IMPROVED
 
         # Less failures is *probably* an improvement??
-        if self.b.num_failed < self.a.num_failed:
+        if b["FAIL"] < a["FAIL"]:
             return self.IMPROVED
 
-        assert self.b.counts == self.a.counts
+        assert b == a
         return self.EQUIVALENT
 
+    # Lines of context either side of each change.
+    DELTA_CONTEXT = 3
+
     @property
     def delta(self):
-        return difflib.unified_diff(self.a.lines,
-                                    self.b.lines,
-                                    fromfile=self.a.shortname,
-                                    tofile=self.b.shortname)
+        a, b = self.a.lines, self.b.lines
+        if a == b:
+            # Don't make difflib work to find nothing.
+            return iter(())
+
+        # Most pairs differ only somewhere in the middle, so trim
+        # the common head and tail (less the context difflib will
+        # want) rather than have difflib match them line by line.
+        head = 0
+        for line_a, line_b in zip(a, b):
+            if line_a != line_b:
+                break
+            head += 1
+        tail = 0
+        for line_a, line_b in zip(reversed(a[head:]), reversed(b[head:])):
+            if line_a != line_b:
+                break
+            tail += 1
+        head = max(head - self.DELTA_CONTEXT, 0)
+        tail = max(tail - self.DELTA_CONTEXT, 0)
+
+        delta = difflib.unified_diff(a[head:len(a) - tail],
+                                     b[head:len(b) - tail],
+                                     fromfile=self.a.shortname,
+                                     tofile=self.b.shortname,
+                                     n=self.DELTA_CONTEXT)
+        if head == 0:
+            return delta
+        return self._offset_hunks(delta, head)
+
+    HUNK_HEADER_RE = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@$")
+
+    @classmethod
+    def _offset_hunks(cls, delta, offset):
+        """Renumber hunk headers for a delta of trimmed sequences."""
+        for line in delta:
+            if line.startswith("@@ "):
+                start_a, len_a, start_b, len_b = \
+                    cls.HUNK_HEADER_RE.match(line.rstrip()).groups()
+                line = "@@ -%d%s +%d%s @@\n" % (int(start_a) + offset,
+                                                len_a or "",
+                                                int(start_b) + offset,
+                                                len_b or "")
+            yield line
 
     @property
     def prettydelta(self):
@@ -686,6 +805,8 @@ class SumfileTestcasePair(object):
                 line = "\x1B[%dm%s\x1B[0m" % (color, line)
             yield line
 
+SumfileTestcasePair._cls_init()
+
 class UncookedCountsReport(object):
     def __init__(self, a, b):
         self.a = a
@@ -734,9 +855,7 @@ class Reporter(object):
 class CountsReport(Reporter):
     @property
     def report_lines(self):
-        total = reduce(operator.add,
-                       (len(pairs)
-                        for pairs in self.pairs_by_category.values()))
+        total = sum(map(len, self.pairs_by_category.values()))
         for cat in self.categories:
             count = len(self.pairs_by_category[cat])
             yield "%20s %4d %5.1f%%" % (cat, count, 100*count/total)
@@ -797,22 +916,21 @@ class BuildErrorsReport(Reporter):
 class GroupedBuildErrorsReport(Reporter):
     @property
     def report_lines(self):
-        testcases_by_msg = {}
-        filenames_by_msg = {}
+        testcases_by_msg = defaultdict(set)
+        filenames_by_msg = defaultdict(set)
+        split = SumfileTestcase.split_build_error
+        compiler_prefixes = SumfileTestcase._compiler_prefixes
         for cat in self.categories:
             if cat == SumfileTestcasePair.IDENTICAL:
                 continue
             for pair in self.pairs_by_category[cat]:
                 for line in pair.b.terse_build_errors:
-                    prefix, msg = pair.b.WARNING_ERROR_RE.split(line)
-                    if prefix in pair.b._compiler_prefixes:
+                    prefix, msg = split(line)
+                    if prefix in compiler_prefixes:
                         continue
                     msg = msg.rstrip()
-                    for tmp, value in ((testcases_by_msg, pair.shortname),
-                                        (filenames_by_msg, prefix)):
-                        if msg not in tmp:
-                            tmp[msg] = {}
-                        tmp[msg][value] = True
+                    testcases_by_msg[msg].add(pair.shortname)
+                    filenames_by_msg[msg].add(prefix)
 
         is_first_line = True
         for msg, filenames in sorted(filenames_by_msg.items()):
@@ -851,18 +969,20 @@ class LogfileDeltaWriter(Reporter):
             testclass = sumfile._testclass
             shortname = None
             written = skipped = 0
-            for line in open(src_filename, "r").readlines():
-                if testclass.is_runline(line):
-                    shortname = testclass._shortname_from_runline(line)
-                if not self._include.get(shortname, False):
-                    skipped += 1
-                else:
-                    fp.write(line)
-                    written += 1
+            with open(src_filename, "r",
+                      buffering=sumfile.READ_BUFSIZE) as src:
+                for line in src:
+                    if testclass.is_runline(line):
+                        shortname = testclass._shortname_from_runline(line)
+                    if not self._include.get(shortname, False):
+                        skipped += 1
+                    else:
+                        fp.write(line)
+                        written += 1
             print("%8d lines written" % written, file=sys.stderr)
             print("%8d lines skipped" % skipped, file=sys.stderr)
 
-def main():
+def main(argv=None):
     parser = argparse.ArgumentParser(
         usage="diffsum [OPTION]... FILE1 FILE2",
         description="Compare two DejaGnu summary log (.sum) output files.",
@@ -886,7 +1006,7 @@ def main():
         "--all", action="store_true",
         help="list all test results, ")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
     Reporter.verbosity = args.verbose
     a, b = map(Sumfile, args.filenames)
 
@@ -895,12 +1015,9 @@ def main():
         return
 
     # Group the testresult pairs by category.
-    pairs_by_category = {}
+    pairs_by_category = defaultdict(list)
     for pair in a.compare(b):
-        cat = pair.category
-        if cat not in pairs_by_category:
-            pairs_by_category[cat] = []
-        pairs_by_category[cat].append(pair)
+        pairs_by_category[pair.category].append(pair)
 
     if args.filter_logfiles:
         LogfileDeltaWriter(pairs_by_category).write_deltas()
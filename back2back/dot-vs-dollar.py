@@ -10,28 +10,110 @@ import os
 import re
 import subprocess
 
+from concurrent.futures import ThreadPoolExecutor
+
+# Files in GDB test output directories that are never ELF.
+NOT_ELF_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".d", ".exp", ".gdb",
+                    ".h", ".hpp", ".log", ".py", ".sum", ".txt")
+
 def is_elf(filename):
-    return open(filename, "rb").read(4) == b"\177ELF"
+    # Most candidates aren't ELF, so skip Python's file objects.
+    try:
+        fd = os.open(filename, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        return os.read(fd, 4) == b"\177ELF"
+    finally:
+        os.close(fd)
 
-_DW2_STRING_RE = re.compile(r'^\s*\[\s*[0-9a-f]+\]\s+"(.*)"$')
+_DW2_STRING_RE = re.compile(br'^\s*\[\s*[0-9a-f]+\]\s+"(.*)"$')
 
 def dw2_strings(filename):
-    cp = subprocess.run(["eu-readelf",
-                         "--debug-dump=str",
-                         filename],
-                        check=True,
-                        stdout=subprocess.PIPE,
-                        encoding="utf-8")
-    for line in cp.stdout.split("\n"):
-        m = _DW2_STRING_RE.match(line)
-        if m is None:
-            #print("\x1B[33m%s\x1B[0m" % repr(line))
-            assert (not line
-                    or line.lstrip() == "Offset  String"
-                    or line.startswith("DWARF section ["))
-            continue
-        #print(m.group(1))
-        yield m.group(1)
+    match = _DW2_STRING_RE.match
+    with subprocess.Popen(["eu-readelf",
+                           "--debug-dump=str",
+                           filename],
+                          stdout=subprocess.PIPE) as proc:
+        # Match the undecoded output, and decode only the strings.
+        for line in proc.stdout:
+            line = line.rstrip(b"\n")
+            m = match(line)
+            if m is None:
+                #print("\x1B[33m%s\x1B[0m" % repr(line))
+                assert (not line
+                        or line.lstrip() == b"Offset  String"
+                        or line.startswith(b"DWARF section ["))
+                continue
+            #print(m.group(1))
+            yield m.group(1).decode("utf-8")
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+def cfe_basenames(gcc_dirpath):
+    """Return the names of the files in GCC_DIRPATH's Clang twin."""
+    cfe_dirpath = gcc_dirpath.replace("/with-gcc/", "/with-clang/")
+    try:
+        with os.scandir(cfe_dirpath) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+def cfe_failed_more(gcc_filename):
+    """Return True if Clang FAILed a test that GCC didn't fail,
+    according to GCC_FILENAME and its Clang twin."""
+    cfe_filename = gcc_filename.replace("/with-gcc/", "/with-clang/")
+    # XFAIL: and KFAIL: lines count as GCC failing too.
+    gcc_lines = set()
+    with open(gcc_filename) as fp:
+        for line in fp:
+            line = line.rstrip("\n")
+            gcc_lines.add(line)
+            gcc_lines.add(line[1:])
+    with open(cfe_filename) as fp:
+        for line in fp:
+            if not line.startswith("FAIL:"):
+                line = line[1:]
+            if not line.startswith("FAIL:"):
+                continue
+            if line.rstrip("\n") not in gcc_lines:
+                #print("CFE", line.rstrip())
+                return True
+    return False
+
+def dot_vs_dollar(gcc_filename):
+    """Return (GCC, Clang) pairs of strings that differ only by . vs $.
+
+    The caller must check that GCC_FILENAME has a Clang twin.
+    """
+    if not is_elf(gcc_filename):
+        return []
+    cfe_filename = gcc_filename.replace("/with-gcc/", "/with-clang/")
+    if not is_elf(cfe_filename):
+        return []
+    try:
+        cfe_strings = \
+            [s for s in dw2_strings(cfe_filename) if "$" in s]
+    except subprocess.CalledProcessError:
+        return []
+    if not cfe_strings:
+        return []
+    #print("%s: CFE has %s"
+    #      % (cfe_filename,
+    #         ", ".join(map(repr, cfe_strings))))
+    targets = frozenset(cs.replace("$", ".") for cs in cfe_strings)
+    try:
+        gcc_strings = \
+            [s for s in dw2_strings(gcc_filename) if s in targets]
+    except subprocess.CalledProcessError:
+        return []
+    cfe_strings = frozenset(cfe_strings)
+    result = []
+    for gs in gcc_strings:
+        cs = gs.replace(".", "$")
+        assert cs in cfe_strings
+        result.append((gs, cs))
+    return result
 
 def main():
     for gcc_filename in sorted(glob.glob("/gdbtest/2020-10-12/with-gcc/"
@@ -39,17 +121,7 @@ def main():
                                          + "/*/gdb.sum")):
         # Only examine directories where Clang FAILed a test
         # that GCC didn't fail.
-        cfe_filename = gcc_filename.replace("/with-gcc/", "/with-clang/")
-        gcc_sumfile = open(gcc_filename).read()
-        for line in open(cfe_filename).readlines():
-            if not line.startswith("FAIL:"):
-                line = line[1:]
-            if not line.startswith("FAIL:"):
-                continue
-            if gcc_sumfile.find(line) == -1:
-                #print("CFE", line.rstrip())
-                break
-        else:
+        if not cfe_failed_more(gcc_filename):
             continue
 
         gcc_test_topdir = os.path.dirname(gcc_filename)
@@ -57,39 +129,18 @@ def main():
         #if not gcc_test_topdir.endswith("/gdb.base/msym-lang"):
         #    continue
         #print("Examining", gcc_test_topdir)
+        gcc_filenames = []
         for dirpath, dirnames, filenames in os.walk(gcc_test_topdir):
+            cfe_names = cfe_basenames(dirpath)
             for gcc_filename in filenames:
-                gcc_filename = os.path.join(dirpath, gcc_filename)
-                if not is_elf(gcc_filename):
-                    continue
-                cfe_filename = gcc_filename.replace("/with-gcc/",
-                                                    "/with-clang/")
-                if not os.path.isfile(cfe_filename):
-                    continue
-                if not is_elf(cfe_filename):
-                    continue
-                try:
-                    cfe_strings = \
-                        [s for s in dw2_strings(cfe_filename) if "$" in s]
-                except subprocess.CalledProcessError:
-                    continue
-                if not cfe_strings:
-                    continue
-                #print("%s.exp: CFE has %s"
-                #      % (testname,
-                #         ", ".join(map(repr, cfe_strings))))
-                try:
-                    gcc_strings = \
-                        [s for s in dw2_strings(gcc_filename)
-                         if s in [cs.replace("$", ".")
-                                  for cs in cfe_strings]]
-                except subprocess.CalledProcessError:
-                    continue
-                if not gcc_strings:
+                if gcc_filename.endswith(NOT_ELF_SUFFIXES):
                     continue
-                for gs in gcc_strings:
-                    cs = gs.replace(".", "$")
-                    assert cs in cfe_strings
+                if gcc_filename in cfe_names:
+                    gcc_filenames.append(os.path.join(dirpath, gcc_filename))
+        # Each ELF costs two eu-readelf runs; do several at once.
+        with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+            for pairs in executor.map(dot_vs_dollar, gcc_filenames):
+                for gs, cs in pairs:
                     print("%s.exp: %s => %s" % (testname, gs, cs))
 
 if __name__ == "__main__":
@@ -11,18 +11,28 @@ import re
 import subprocess
 import sys
 
+from concurrent.futures import ThreadPoolExecutor
+
 def dwgrep(pattern, filename, check=False, debug=False):
     if debug:
         print("\x1B[31m%s\x1B[0m" % filename)
-    cp = subprocess.run(["dwarfdump", filename],
-                        check=check,
-                        stdout=subprocess.PIPE,
-                        encoding="utf-8")
-    for line in cp.stdout.split("\n"):
-        if not line:
-            continue
-        if pattern.search(line):
-            print(filename+":", line)
+    for line in dwgrep_lines(pattern, filename, check):
+        print(filename+":", line)
+
+def dwgrep_lines(pattern, filename, check=False):
+    # PATTERN is a bytes pattern: dwarfdump's output is searched
+    # undecoded, and only the lines that match are decoded.
+    search = pattern.search
+    with subprocess.Popen(["dwarfdump", filename],
+                          stdout=subprocess.PIPE) as proc:
+        for line in proc.stdout:
+            line = line.rstrip(b"\n")
+            if not line:
+                continue
+            if search(line):
+                yield line.decode("utf-8")
+    if check and proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
 
 def main():
     if len(sys.argv) < 3:
@@ -33,17 +43,27 @@ def main():
             + "~/2020-11-12/with-{gcc,clang}/gdb/testsuite/outputs")),
               file=sys.stderr)
         sys.exit(1)
-    pattern = re.compile(sys.argv[1], re.I)
+    pattern = re.compile(os.fsencode(sys.argv[1]), re.I)
+    todo = []
     for filename in sys.argv[2:]:
         if not os.path.isdir(filename):
-            dwgrep(pattern, filename)
+            todo.append(filename)
             continue
         for dirpath, dirnames, filenames in os.walk(filename):
             for filename in filenames:
                 filename = os.path.join(dirpath, filename)
                 if not os.access(filename, os.X_OK):
                     continue
-                dwgrep(pattern, filename)
+                todo.append(filename)
+
+    # Each file costs one dwarfdump run, so keep every CPU
+    # busy with one.  Results are printed in the usual order.
+    def grep_one(filename):
+        return filename, list(dwgrep_lines(pattern, filename))
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for filename, lines in executor.map(grep_one, todo):
+            for line in lines:
+                print(filename+":", line)
 
 if __name__ == "__main__":
     if "sys" not in locals():
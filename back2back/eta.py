@@ -12,14 +12,15 @@ NOT_PRESENT = "NOT_PRESENT"
 
 def read_ds_a(filename):
     results = {}
-    for line in open(filename).readlines():
-        if ":" not in line:
-            #print(repr(line))
-            continue
-        status, testname = line.split(":")
-        testname = testname.strip()
-        assert testname not in results
-        results[testname] = status
+    with open(filename) as fp:
+        for line in fp:
+            if ":" not in line:
+                #print(repr(line))
+                continue
+            status, testname = line.split(":")
+            testname = testname.strip()
+            assert testname not in results
+            results[testname] = status
     return results
 
 class Tabulator(object):
@@ -6,15 +6,25 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 import difflib
+import hashlib
+import os
+import pickle
 import subprocess
+import tempfile
 
 class Symbol(object):
+    __slots__ = ("type", "name", "value")
+
     def __init__(self, type, name, value=None):
         assert len(type) == 1
         self.type = type
         self.name = name
         self.value = value
 
+    def __reduce__(self):
+        # Keeps cached symbol lists small and quick to load.
+        return Symbol, (self.type, self.name, self.value)
+
     @property
     def type_and_name(self):
         if self.name is None:
@@ -22,28 +32,133 @@ class Symbol(object):
         else:
             return " ".join((self.type, self.name))
 
+def _nm_lines(filenames, stderr=None):
+    with subprocess.Popen(["nm"] + filenames,
+                          stdout=subprocess.PIPE,
+                          stderr=stderr,
+                          encoding="utf-8") as proc:
+        for line in proc.stdout:
+            line = line.rstrip("\n")
+            if line:
+                yield line
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, proc.args)
+
+def _symbol(line):
+    try:
+        if line[0].isspace():
+            return Symbol(*line.lstrip().split(None, 1))
+        else:
+            vtn = line.split(None, 2)
+            if len(vtn) == 2:
+                vtn.append(None)
+            value, type, name = vtn
+            return Symbol(type, name, value)
+    except ValueError as e:
+        raise ValueError("%s: %s" % (line, e))
+
 def _elf_symbols(filename):
-    cp = subprocess.run(["nm", filename],
-                        check=True,
-                        stdout=subprocess.PIPE,
-                        encoding="utf-8")
-    for line in cp.stdout.split("\n"):
-        if not line:
-            continue
-        try:
-            if line[0].isspace():
-                yield Symbol(*line.lstrip().split(None, 1))
-            else:
-                vtn = line.split(None, 2)
-                if len(vtn) == 2:
-                    vtn.append(None)
-                value, type, name = vtn
-                yield Symbol(type, name, value)
-        except ValueError as e:
-            raise ValueError("%s: %s" % (line, e))
+    for line in _nm_lines([filename]):
+        yield _symbol(line)
+
+def _elf_symbols_batch(filenames):
+    """Return a dict mapping FILENAMES to lists of their symbols,
+    from one nm run.
+
+    Given more than one file, nm precedes each file's symbols with
+    a "FILENAME:" line.  Unreadable files get no such line, but they
+    also make nm fail, and the whole batch with it.  nm's complaints
+    are discarded, since the caller will retry one file at a time.
+    """
+    headers = {filename + ":": filename for filename in filenames}
+    result = {}
+    symbols = None
+    for line in _nm_lines(list(filenames), stderr=subprocess.DEVNULL):
+        filename = headers.get(line)
+        if filename is not None:
+            symbols = result[filename] = []
+        elif symbols is not None:
+            symbols.append(_symbol(line))
+    return result
+
+CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "gdbtest", "nm")
+
+def _cache_key(filename):
+    realpath = os.path.realpath(filename)
+    st = os.stat(realpath)
+    key = realpath, st.st_mtime_ns, st.st_size
+    cache_filename = os.path.join(
+        CACHE_DIR, hashlib.blake2b(os.fsencode(realpath),
+                                   digest_size=16).hexdigest())
+    return key, cache_filename
+
+def _cache_load(key, cache_filename):
+    try:
+        with open(cache_filename, "rb") as fp:
+            if pickle.load(fp) == key:
+                return pickle.load(fp)
+    except (OSError, EOFError, pickle.UnpicklingError):
+        pass # Missing, unreadable or truncated; (re)write it.
+
+def _cache_store(key, cache_filename, symbols):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=CACHE_DIR,
+                                         delete=False) as fp:
+            pickle.dump(key, fp, pickle.HIGHEST_PROTOCOL)
+            pickle.dump(symbols, fp, pickle.HIGHEST_PROTOCOL)
+        os.replace(fp.name, cache_filename)
+    except OSError:
+        pass # Caching is only an optimization.
 
 def elf_symbols(filename):
-    return list(_elf_symbols(filename))
+    """Return a list of FILENAME's symbols.
+
+    Results are cached on disk, keyed on the file's real path, and
+    reused for as long as its size and modification time match.
+    """
+    key, cache_filename = _cache_key(filename)
+    result = _cache_load(key, cache_filename)
+    if result is None:
+        result = list(_elf_symbols(filename))
+        _cache_store(key, cache_filename, result)
+    return result
+
+def elf_symbols_many(filenames):
+    """Return a dict mapping FILENAMES to lists of their symbols.
+
+    Like elf_symbols, but every uncached file is handled by one nm
+    run rather than one each.  Files nm can't read are omitted.
+    """
+    result = {}
+    misses = []
+    for filename in filenames:
+        key, cache_filename = _cache_key(filename)
+        symbols = _cache_load(key, cache_filename)
+        if symbols is None:
+            misses.append((filename, key, cache_filename))
+        else:
+            result[filename] = symbols
+    if len(misses) > 1:
+        try:
+            batch = _elf_symbols_batch([miss[0] for miss in misses])
+        except subprocess.CalledProcessError:
+            pass # Something's unreadable; go one at a time.
+        else:
+            for filename, key, cache_filename in misses:
+                result[filename] = symbols = batch[filename]
+                _cache_store(key, cache_filename, symbols)
+            misses = []
+    for filename, key, cache_filename in misses:
+        try:
+            symbols = list(_elf_symbols(filename))
+        except subprocess.CalledProcessError:
+            continue
+        result[filename] = symbols
+        _cache_store(key, cache_filename, symbols)
+    return result
 
 def main():
     a, b = sys.argv[1:]
@@ -6,11 +6,14 @@ from __future__ import division
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import contextlib
 import diffsum
 import glob
 import os
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
+
 def filename_pairs():
     gcc_filenames = list(sorted(glob.glob("*gcc*.sum")))
     for gcc1_gcc2 in zip(gcc_filenames, gcc_filenames[1:] + [None]):
@@ -22,9 +25,29 @@ def filename_pairs():
             c2 = g2.replace("gcc", "clang")
             yield c1, c2  # Each baremetal-clang-{YYYYMMDD[N,N+1]} pair.
 
-def main():
-    os.chdir(os.path.dirname(os.path.realpath(diffsum.__file__)))
-    for filenames in filename_pairs():
+class RecordingStream(object):
+    """A file-like object that appends its writes to a shared list."""
+
+    def __init__(self, name, chunks):
+        self.name = name
+        self.chunks = chunks
+
+    def write(self, text):
+        self.chunks.append((self.name, text))
+        return len(text)
+
+    def flush(self):
+        pass
+
+def smoke_one(filenames):
+    """Run diffsum on one pair, returning everything it printed.
+
+    The result is a list of (stream name, text) chunks, so the
+    caller can replay each pair's output in its original order.
+    """
+    result = []
+    with contextlib.redirect_stdout(RecordingStream("stdout", result)), \
+         contextlib.redirect_stderr(RecordingStream("stderr", result)):
         print(" <=> ".join(filenames), file=sys.stderr)
         for args in (#["--uncooked"],
                      #["--report-errors"],
@@ -34,13 +57,24 @@ def main():
                      #["--verbose", "--verbose"],
                     ):
             #print("  " + " ".join(args), file=sys.stderr)
-            sys.argv[1:] = args + list(filenames)
             try:
-                diffsum.main()
+                diffsum.main(args + list(filenames))
             except KeyboardInterrupt:
                 raise
             except:
                 print("FAIL!", file=sys.stderr)
+    return result
+
+def main():
+    os.chdir(os.path.dirname(os.path.realpath(diffsum.__file__)))
+    # Every pair is independent, so run them in separate processes
+    # (diffsum keeps its verbosity in a class attribute) and print
+    # their output in the usual order.
+    max_workers = max(1, os.cpu_count() - 2)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for chunks in executor.map(smoke_one, filename_pairs()):
+            for stream, text in chunks:
+                getattr(sys, stream).write(text)
 
 if __name__ == "__main__":
     if "sys" not in locals():
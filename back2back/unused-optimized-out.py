@@ -8,73 +8,133 @@ from __future__ import unicode_literals
 import glob
 import nmdiff
 import os
-import subprocess
+
+from concurrent.futures import ProcessPoolExecutor
+
+# Files in GDB test output directories that are never ELF.
+NOT_ELF_SUFFIXES = (".c", ".cc", ".cpp", ".cxx", ".d", ".exp", ".gdb",
+                    ".h", ".hpp", ".log", ".py", ".sum", ".txt")
 
 def is_elf(filename):
-    return open(filename, "rb").read(4) == b"\177ELF"
+    # Most candidates aren't ELF, so skip Python's file objects.
+    try:
+        fd = os.open(filename, os.O_RDONLY)
+    except OSError:
+        return False
+    try:
+        return os.read(fd, 4) == b"\177ELF"
+    finally:
+        os.close(fd)
+
+def cfe_basenames(gcc_dirpath):
+    """Return the names of the files in GCC_DIRPATH's Clang twin."""
+    cfe_dirpath = gcc_dirpath.replace("/with-gcc/", "/with-clang/")
+    try:
+        with os.scandir(cfe_dirpath) as entries:
+            return {entry.name for entry in entries if entry.is_file()}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+def cfe_failed_more(gcc_filename):
+    """Return True if Clang FAILed a test that GCC didn't fail,
+    according to GCC_FILENAME and its Clang twin."""
+    cfe_filename = gcc_filename.replace("/with-gcc/", "/with-clang/")
+    # XFAIL: and KFAIL: lines count as GCC failing too.
+    gcc_lines = set()
+    with open(gcc_filename) as fp:
+        for line in fp:
+            line = line.rstrip("\n")
+            gcc_lines.add(line)
+            gcc_lines.add(line[1:])
+    with open(cfe_filename) as fp:
+        for line in fp:
+            if not line.startswith("FAIL:"):
+                line = line[1:]
+            if not line.startswith("FAIL:"):
+                continue
+            if line.rstrip("\n") not in gcc_lines:
+                #print("CFE", line.rstrip())
+                return True
+    return False
+
+def process_testdir(gcc_test_topdir):
+    """Return True if any ELF under GCC_TEST_TOPDIR has a local
+    symbol that its Clang twin lacks."""
+    elf_pairs = []
+    for dirpath, dirnames, filenames in os.walk(gcc_test_topdir):
+        cfe_names = cfe_basenames(dirpath)
+        for gcc_filename in filenames:
+            if gcc_filename.endswith(NOT_ELF_SUFFIXES):
+                continue
+            if gcc_filename not in cfe_names:
+                continue
+            gcc_filename = os.path.join(dirpath, gcc_filename)
+            if not is_elf(gcc_filename):
+                continue
+            cfe_filename = gcc_filename.replace("/with-gcc/",
+                                                "/with-clang/")
+            if not is_elf(cfe_filename):
+                continue
+            elf_pairs.append((gcc_filename, cfe_filename))
+
+    # One nm run covers every uncached file in the test, and the
+    # results are cached, so reruns over an unchanged tree don't
+    # run nm at all.  Files nm can't read are left out.
+    symbols = nmdiff.elf_symbols_many(
+        [filename for elf_pair in elf_pairs for filename in elf_pair])
+    for gcc_filename, cfe_filename in elf_pairs:
+        if gcc_filename not in symbols or cfe_filename not in symbols:
+            continue
+        # Clang's side is only ever looked up by name, so keep just
+        # the names, and keep all of them: a symbol Clang made global
+        # still counts.
+        in_gcc = {sym.name: sym for sym in symbols[gcc_filename]}
+        in_cfe = {sym.name for sym in symbols[cfe_filename]}
+        # Any one symbol settles it, so don't sort them first.
+        for sym_name, sym in in_gcc.items():
+            if sym_name in in_cfe:
+                continue
+            if sym.value is None:
+                continue
+            if "." in sym_name:
+                continue # XXX internal stuff?
+            if sym.type != sym.type.lower():
+                continue
+            #if (sym_name.startswith("_Z")
+            #    or sym_name.find("__Z") >= 0):
+            #    continue # XXX C++?
+            #print("%s: %s: %s" % (cfe_filename,
+            #                      sym.type,
+            #                      sym_name))
+            return True
+    return False
 
 def main():
+    gcc_test_topdirs = []
     for gcc_filename in sorted(glob.glob("/gdbtest/2020-10-12/with-gcc/"
                                          + "gdb/testsuite/outputs/gdb.*"
                                          + "/*/gdb.sum")):
         # Only examine directories where Clang FAILed a test
         # that GCC didn't fail.
-        cfe_filename = gcc_filename.replace("/with-gcc/", "/with-clang/")
-        gcc_sumfile = open(gcc_filename).read()
-        for line in open(cfe_filename).readlines():
-            if not line.startswith("FAIL:"):
-                line = line[1:]
-            if not line.startswith("FAIL:"):
-                continue
-            if gcc_sumfile.find(line) == -1:
-                #print("CFE", line.rstrip())
-                break
-        else:
+        if not cfe_failed_more(gcc_filename):
             continue
 
         gcc_test_topdir = os.path.dirname(gcc_filename)
-        testname = os.sep.join(gcc_test_topdir.split(os.sep)[-2:])
         #if not gcc_test_topdir.endswith("/gdb.base/msym-lang"):
         #    continue
         #print("Examining", gcc_test_topdir)
-        for dirpath, dirnames, filenames in os.walk(gcc_test_topdir):
-            for gcc_filename in filenames:
-                gcc_filename = os.path.join(dirpath, gcc_filename)
-                if not is_elf(gcc_filename):
-                    continue
-                cfe_filename = gcc_filename.replace("/with-gcc/",
-                                                    "/with-clang/")
-                if not os.path.isfile(cfe_filename):
-                    continue
-                if not is_elf(cfe_filename):
-                    continue
-                try:
-                    gcc_symbols = nmdiff.elf_symbols(gcc_filename)
-                    cfe_symbols = nmdiff.elf_symbols(cfe_filename)
-                except subprocess.CalledProcessError:
-                    continue
-                in_gcc = dict((sym.name, sym) for sym in gcc_symbols)
-                in_cfe = dict((sym.name, sym) for sym in cfe_symbols)
-                for sym_name, sym in sorted(in_gcc.items()):
-                    if sym_name in in_cfe:
-                        continue
-                    if sym.value is None:
-                        continue
-                    if "." in sym_name:
-                        continue # XXX internal stuff?
-                    if sym.type != sym.type.lower():
-                        continue
-                    #if (sym_name.startswith("_Z")
-                    #    or sym_name.find("__Z") >= 0):
-                    #    continue # XXX C++?
-                    #print("%s: %s: %s" % (cfe_filename,
-                    #                      sym.type,
-                    #                      sym_name))
-                    print(testname)
-                    break
-                else:
-                    continue
-                break
+        gcc_test_topdirs.append(gcc_test_topdir)
+
+    # Each test directory is independent, and parsing nm's output
+    # is Python work, so spread the directories over processes.
+    with ProcessPoolExecutor(max_workers=os.cpu_count()) as executor:
+        for gcc_test_topdir, found in zip(
+                gcc_test_topdirs,
+                executor.map(process_testdir, gcc_test_topdirs,
+                             chunksize=8)):
+            if found:
+                testname = os.sep.join(gcc_test_topdir.split(os.sep)[-2:])
+                print(testname)
 
 if __name__ == "__main__":
     if "sys" not in locals():
@@ -7,49 +7,61 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 class RPM(object):
+    __slots__ = ("name", "version", "release", "arch", "_str")
+
     def __init__(self, rpm_nvra):
         #print("\x1B[33m%s\x1B[0m" % rpm_nvra)
-        tmp = rpm_nvra.split(".")
-        if len(tmp) > 1:
-            self.arch = tmp.pop()
+        nvr, dot, arch = rpm_nvra.rpartition(".")
+        if dot:
+            self.arch = arch
         else:
-            self.arch = None
-        tmp = ".".join(tmp).split("-")
-        self.release = tmp.pop()
-        self.version = tmp.pop()
-        self.name = "-".join(tmp)
-        assert str(self) == rpm_nvra
+            nvr, self.arch = rpm_nvra, None
+        nv, _, self.release = nvr.rpartition("-")
+        self.name, _, self.version = nv.rpartition("-")
+        # A well-formed NVRA is its own canonical form, so keep the
+        # original string for __str__ rather than rebuilding it.
+        assert self._build_str() == rpm_nvra
+        self._str = rpm_nvra
 
     @property
     def nvra(self):
         return self.name, self.version, self.release, self.arch
 
-    def __str__(self):
+    def _build_str(self):
         result = "-".join(self.nvra[:-1])
         if self.arch is not None:
             result = ".".join((result, self.arch))
         return result
 
+    def __str__(self):
+        return self._str
+
+# rpm -qa listings are small enough to read in one go.
+READ_BUFSIZE = 1 << 20
+
 def main(debug=False):
     packages = {}
-    for line in open("rpm-qa.container-6ead8216858b").readlines():
-        pkg = RPM(line.rstrip())
-        assert pkg.name not in packages
-        packages[pkg.name] = pkg
-
-    for line in open("rpm-qa.vm-202002071318").readlines():
-        pkg = RPM(line.rstrip())
-        old = packages.pop(pkg.name, None)
-        if old is None:
-            if debug:
-                print("V only:", pkg)
-            continue
-        elif str(pkg) == str(old):
-            if debug:
-                print("  Both:", pkg)
-            continue
-        else:
-            print("\x1B[1;31mSKEW:\x1B[0m", old, pkg)
+    with open("rpm-qa.container-6ead8216858b",
+              buffering=READ_BUFSIZE) as fp:
+        for line in fp:
+            pkg = RPM(line.rstrip())
+            assert pkg.name not in packages
+            packages[pkg.name] = pkg
+
+    with open("rpm-qa.vm-202002071318", buffering=READ_BUFSIZE) as fp:
+        for line in fp:
+            pkg = RPM(line.rstrip())
+            old = packages.pop(pkg.name, None)
+            if old is None:
+                if debug:
+                    print("V only:", pkg)
+                continue
+            elif str(pkg) == str(old):
+                if debug:
+                    print("  Both:", pkg)
+                continue
+            else:
+                print("\x1B[1;31mSKEW:\x1B[0m", old, pkg)
 
     if debug:
         for name, pkg in sorted(packages.items()):